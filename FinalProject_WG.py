@@ -1,13 +1,23 @@
+import os
+from collections import defaultdict
+from itertools import islice
+
+import numpy as np
 import pandas as pd
 import streamlit as st
-import matplotlib.pyplot as plt
+import altair as alt
 import pydeck as pdk
 
+from preprocess import build_clean_parquet, clean_parquet_path
+
 # Defining a color for charts
 CHART1_COLOR = '#1F78B4'  # Blue
 CHART2_COLOR = '#FF7F00'  # Orange
 CHART3_COLOR = '#33A02C'  # Green
 
+# Columns the website uses (selected when reading the Parquet copy of the CSV)
+DATA_COLUMNS = ['Meteorite Name', 'Classification', 'Mass (g)', 'Discovery Type', 'Year', 'Latitude', 'Longitude']
+
 # Categorizing meteorite classifications labels into words for dropdown menu
 meteorite_class = {
     # CHONDRITES
@@ -46,6 +56,18 @@ meteorite_class = {
     "Pallasite": "Stony-Iron", "Mesosiderite": "Stony-Iron"
 }
 
+# Grouping the raw classifications under each major type once, so nothing has to rescan the dictionary later
+TYPE_TO_CLASSES = defaultdict(list)
+for raw_class, major_type in meteorite_class.items():
+    TYPE_TO_CLASSES[major_type].append(raw_class)
+MAJOR_TYPES = tuple(TYPE_TO_CLASSES)
+
+# Lookup table built once from the groups: position i holds the major type code of the i-th raw classification
+TYPE_CATEGORIES = sorted(MAJOR_TYPES)
+CLASS_CATEGORIES = [raw_class for major_type in TYPE_CATEGORIES for raw_class in TYPE_TO_CLASSES[major_type]]
+TYPE_LOOKUP = np.repeat(np.arange(len(TYPE_CATEGORIES), dtype=np.int8),
+                        [len(TYPE_TO_CLASSES[major_type]) for major_type in TYPE_CATEGORIES])
+
 
 # [FUNCCALL2]: Counts the number of records (data)
 def get_df_count(df):
@@ -53,30 +75,92 @@ def get_df_count(df):
 
 
 # Function: This function returns the DataFrame and the initial record count.
+# Cached so the data is only read once instead of on every widget interaction
+@st.cache_data(show_spinner="Loading meteorites…")
 def read_meteorite_date(FILENAME):
-    df = pd.read_csv(FILENAME).set_index('id')
+    # The CSV is cleaned once into Parquet (see preprocess.py); every later start only reads the cleaned columns
+    parquet_file = clean_parquet_path(FILENAME)
+    if not os.path.exists(parquet_file):
+        build_clean_parquet(FILENAME)
+
+    df = pd.read_parquet(parquet_file, engine='pyarrow', columns=DATA_COLUMNS)
+    df = add_type(df)  # Done here so the one cached call returns the typed data
     total_records = len(df)  # Stored for return
-    # [COLUMNS]
-    df = df.drop(columns=['nametype', 'GeoLocation'])  # Drops 2 columns that are not relevant to website
-    # Renaming columns for more clarification
-    df = df.rename(columns={
-        'name': 'Meteorite Name',
-        'recclass': 'Classification',
-        'mass (g)': 'Mass (g)',
-        'fall': 'Discovery Type',
-        'year': 'Year',
-        'reclat': 'Latitude',
-        'reclong': 'Longitude'
-    })
-
-    # Cleaning Classification Data (removing numbers)
-    df['Classification'] = df['Classification'].str.replace('\d+', '', regex=True).str.strip()
-    df['Year'] = pd.to_numeric(df['Year'], errors='coerce')
 
     # [FUNCRETURN2]
     return df, total_records
 
 
+# Function: Adds the major meteorite type for each classification (called by the cached loader)
+def add_type(df):
+    # Indexing the lookup table by classification position instead of a per-row dict lookup (-1 = not in dictionary)
+    codes = pd.Index(CLASS_CATEGORIES).get_indexer(df["Classification"])
+    type_codes = np.where(codes >= 0, TYPE_LOOKUP[codes.clip(0)], np.int8(-1))  # Stays int8, like the category codes
+    # Storing Type as a categorical so filters can compare integer codes instead of strings
+    df["Type"] = pd.Categorical.from_codes(type_codes, categories=TYPE_CATEGORIES)  # [COLUMNS]
+    return df
+
+
+# Function: Finds the slider limits and dropdown options (constant for the dataset, so cached)
+# (like apply_filters, the data is not hashed and is identified by the file it was loaded from)
+@st.cache_data
+def _slider_stats(_df, filename):
+    mass_data = _df['Mass (g)'].dropna()
+    mass_min = float(mass_data.min())  # #[MAXMIN]: Find minimum value
+    mass_max = float(mass_data.max())  # #[MAXMIN]: Find maximum value
+    unique_types = _df["Type"].unique()
+    available_types = sorted([t for t in unique_types if pd.notna(t)])  # [LISTCOMP]
+    return mass_min, mass_max, available_types
+
+
+# Function: Applies the sidebar filters, building one combined mask so the data is only copied once
+# The data itself is not hashed (leading underscore); it is identified by the file it was loaded from
+# Capped at the most recent filter settings, since every slider position would otherwise stay cached
+@st.cache_data(max_entries=32)
+def apply_filters(_df, filename, selected_types, mass_range, year_range):
+    # (missing masses and years are outside every range, so those rows are dropped too)
+    mask = np.ones(len(_df), dtype=bool)
+
+    #[FILTER1]: Comparing the integer category codes of Type
+    if selected_types:
+        type_column = _df["Type"]
+        selected_codes = type_column.cat.categories.get_indexer(selected_types)
+        mask &= np.isin(type_column.cat.codes.to_numpy(), selected_codes)
+
+    #[FILTER2]: Mass
+    mask &= _df['Mass (g)'].between(*mass_range).to_numpy()
+
+    #[FILTER2]: Year
+    mask &= _df['Year'].between(*year_range).to_numpy(dtype=bool, na_value=False)
+
+    # Cleaning data for display
+    return _df[mask].astype({'Year': int})
+
+
+# Function: Counts meteorites per year, discovery type, and major type (a small table the charts are drawn from)
+# Only rows with a mass and a year are counted, matching the rows the sidebar filters keep
+def count_landings(df):
+    df_counted = df.dropna(subset=['Mass (g)', 'Year'])
+    counts = df_counted.groupby(['Year', 'Discovery Type', 'Type'], dropna=False, observed=True).size()
+    # Plain int16 years (no missing values are left) so the charts get a regular numeric axis
+    return counts.reset_index(name='Count').astype({'Year': 'int16'})
+
+
+# Function: Counts for the whole dataset, computed once so most reruns only filter the small counts table
+# (like apply_filters, the data is not hashed and is identified by the file it was loaded from)
+@st.cache_data
+def _all_landing_counts(_df, filename):
+    return count_landings(_df)
+
+
+# [FILTER2]: Applies the type and year filters to the counts table instead of the full data
+def filter_counts(counts, selected_types, year_range):
+    keep = counts['Year'].between(*year_range)
+    if selected_types:
+        keep &= counts['Type'].isin(selected_types)
+    return counts[keep]
+
+
 # [MAP]: Utilized PyDeck and Streamline
 def map_locations(df):
     # Subheader and Text
@@ -84,13 +168,16 @@ def map_locations(df):
     st.caption("Zoom in to explore meteorite discoveries. **Hover over a dot for meteorite information.**")
 
     # Using Latitude and Longitude for PyDeck data
-    df_map = df.dropna(subset=['Latitude', 'Longitude']).copy()  # Create a separate DataFrame with .copy()
-    df_map['lat'] = df_map['Latitude']
-    df_map['lon'] = df_map['Longitude']
-
-    # Cleaning data for the map
-    df_map['Mass (g)'] = df_map['Mass (g)'].round(2)
-    df_map['Type'] = df_map['Type'].fillna('Unknown')
+    # Only the columns the dots and tooltip use are kept, since every column is sent to the browser as JSON
+    # Cleaning data for the map (rounding in float64 so the tooltip shows e.g. 21.3 instead of 21.299999237)
+    # .assign builds the cleaned columns straight into the new DataFrame, so no extra copy is needed
+    df_map = (df.dropna(subset=['Latitude', 'Longitude'])
+              [['Meteorite Name', 'Mass (g)', 'Type', 'Latitude', 'Longitude']]
+              .rename(columns={'Latitude': 'lat', 'Longitude': 'lon'})
+              .assign(**{
+                  'Mass (g)': lambda d: d['Mass (g)'].astype('float64').round(2),
+                  'Type': lambda d: d['Type'].cat.add_categories('Unknown').fillna('Unknown')
+              }))
 
     # Defining PyDeck Layer
     layer = pdk.Layer(
@@ -131,67 +218,48 @@ def map_locations(df):
 
 # [CHART1]: Creating a line graph to display found vs.fallen observations
 # [FUNC2P]
-def chart_landings_over_time(df, found_color=CHART1_COLOR):
+def chart_landings_over_time(counts, found_color=CHART1_COLOR):
     # Subheader and Text
     st.subheader("Chart 1: Meteorite Landings Over Time (Found vs. Fell)")
     st.caption("Shows the time-series distribution of discovered meteorites.")
 
-    yearly_counts = df.dropna(subset=['Year']).groupby(['Year', 'Discovery Type']).size().reset_index(name='Count')
-
-    # [PIVOTTABLE]
-    pivot_counts = yearly_counts.pivot(index='Year', columns='Discovery Type', values='Count').fillna(0)
-
-    fig, ax = plt.subplots(figsize=(10, 5))
+    # [PIVOTTABLE]: Summing the counts table per year and discovery type
+    pivot_counts = counts.groupby(['Year', 'Discovery Type'], observed=True)['Count'].sum().unstack(fill_value=0)
 
-    # Coloring the points
-    color_fell = 'red'
-    color_found = found_color
+    # Coloring the lines
+    line_colors = {'Fell': '#ff0000', 'Found': found_color}
 
     # If-Statements to categorize the data
-    if 'Fell' in pivot_counts.columns:
-        ax.plot(pivot_counts.index, pivot_counts['Fell'], label='Fell', marker='.', linestyle='-', color=color_fell)
-    if 'Found' in pivot_counts.columns:
-        ax.plot(pivot_counts.index, pivot_counts['Found'], label='Found', marker='.', linestyle='-', color=color_found)
-
-    # Creating the table and plotting the points
-    ax.set_title('Annual Count of Meteorite Discoveries')
-    ax.set_xlabel('Year')
-    ax.set_ylabel('Number of Meteorites')
-    ax.legend(title='Discovery Type')
-    ax.grid(True, linestyle='--', alpha=0.6)
-    plt.tight_layout()
-
-    st.pyplot(fig)
-    plt.close(fig)
+    discovery_types = [t for t in line_colors if t in pivot_counts.columns]
+
+    # Drawn by Vega-Lite in the browser, so no image has to be rendered and sent
+    st.line_chart(
+        pivot_counts[discovery_types],
+        color=[line_colors[t] for t in discovery_types],
+        x_label='Year',
+        y_label='Number of Meteorites'
+    )
 
 
 # [CHART2]: Creating a bar chart to show the distribution of meteorite classifications
-def chart_type_distribution(df, bar_color=CHART2_COLOR):
+def chart_type_distribution(counts, bar_color=CHART2_COLOR):
     # Subheader and Text
     st.subheader("Chart 2: Distribution of Major Meteorite Types")
     st.caption("Displays the total count for each unique meteorite classification type in the filtered dataset.")
 
     # [SORT]:Calculate the count for each major meteorite classification and sorting them
-    type_counts = df["Type"].value_counts().sort_values(ascending=False)
+    type_counts = counts.groupby('Type', observed=True)['Count'].sum().sort_values(ascending=False)
 
     if type_counts.empty:
         st.warning("No meteorite types found in the filtered data for charting.")
         return
 
-    # Setting the graph plot
-    fig, ax = plt.subplots(figsize=(10, 6))
-
-    # Creating the bar chart
-    ax.bar(type_counts.index, type_counts.values, color=bar_color)
-
-    ax.set_title('Distribution of Meteorite Types')
-    ax.set_xlabel('Meteorite Type')
-    ax.set_ylabel('Total Count')
-    plt.xticks(rotation=45, ha='right')  # Making sure the text is readable
-    plt.tight_layout()
-
-    st.pyplot(fig)
-    plt.close(fig)
+    # Creating the bar chart (Altair keeps the bars in sorted order, tallest first)
+    bar_chart = alt.Chart(type_counts.reset_index()).mark_bar(color=bar_color).encode(
+        x=alt.X('Type:N', sort='-y', title='Meteorite Type'),
+        y=alt.Y('Count:Q', title='Total Count')
+    )
+    st.altair_chart(bar_chart)
 
 
 # Function to create a Top 10 Chart of meteorite masses according to the filters
@@ -201,38 +269,19 @@ def chart_top_mass_by_year(df, year_range, chart_color=CHART3_COLOR):
     st.caption(
         f"Shows the 10 most massive meteorites discovered/fell between the years {year_range[0]} and {year_range[1]}.")
 
-    df_filtered = df.dropna(subset=['Mass (g)', 'Year']).copy()
-
-    # [FILTER2]
-    df_filtered = df_filtered[
-        (df_filtered['Year'] >= year_range[0]) &
-        (df_filtered['Year'] <= year_range[1])
-        ]
-
-    # [SORT]
-    top_10 = df_filtered.sort_values('Mass (g)', ascending=False).head(10)
-
-    # [COLUMNS]
-    top_10['Mass (kg)'] = top_10['Mass (g)'] / 1000
-    # [SORT]
-    top_10 = top_10.sort_values('Mass (kg)', ascending=True)
+    # [FILTER2]: Missing years fall outside the range (missing masses are skipped by nlargest below)
+    df_filtered = df[df['Year'].between(*year_range).to_numpy(dtype=bool, na_value=False)]
 
-    # Setting the plot
-    fig, ax = plt.subplots(figsize=(10, 6))
+    # [SORT]: Selecting the 10 heaviest without sorting the whole filtered data
+    # [COLUMNS]: Added with .assign on the 10 selected rows only
+    top_10 = df_filtered.nlargest(10, 'Mass (g)').assign(**{'Mass (kg)': lambda d: d['Mass (g)'] / 1000})
 
-    ax.barh(top_10['Meteorite Name'], top_10['Mass (kg)'], color=chart_color)
-
-    # Creating the bar chart
-    ax.set_title(f'Top {len(top_10)} Heaviest Meteorites ({year_range[0]}-{year_range[1]})')
-    ax.set_xlabel('Mass (kg)')
-    ax.set_ylabel('Meteorite Name')
-
-    ax.ticklabel_format(style='plain', axis='x')
-
-    plt.tight_layout()
-
-    st.pyplot(fig)
-    plt.close(fig)
+    # Creating the horizontal bar chart ([SORT]: Altair orders the bars by mass, heaviest on top)
+    bar_chart = alt.Chart(top_10[['Meteorite Name', 'Mass (kg)']]).mark_bar(color=chart_color).encode(
+        x=alt.X('Mass (kg):Q', title='Mass (kg)', axis=alt.Axis(format=',.0f')),
+        y=alt.Y('Meteorite Name:N', sort='-x', title='Meteorite Name')
+    ).properties(title=f'Top {len(top_10)} Heaviest Meteorites ({year_range[0]}-{year_range[1]})')
+    st.altair_chart(bar_chart)
 
 
 # Function to run the overall program
@@ -247,14 +296,12 @@ def main():
 
     # Load data and transform it
     meteorite_data, total_records = read_meteorite_date(FILENAME)  # [FUNCRETURN2]
-    meteorite_data["Type"] = meteorite_data["Classification"].map(meteorite_class)  # [COLUMNS]
+    mass_min, mass_max, available_types = _slider_stats(meteorite_data, FILENAME)
 
     # [ST3] Sidebar Filters
     st.sidebar.header("Data Filters")
 
     # [ST1]: Dropdown / Multi-Select Box
-    unique_types = meteorite_data["Type"].unique()
-    available_types = sorted([t for t in unique_types if pd.notna(t)])  # [LISTCOMP]
     selected_types = st.sidebar.multiselect(
         "Select Meteorite Types",
         available_types,
@@ -274,10 +321,6 @@ def main():
     )
 
     # [ST2]: Double-ended slider (mass)
-    mass_data = meteorite_data['Mass (g)'].dropna()
-    mass_min = float(mass_data.min())  # #[MAXMIN]: Find minimum value
-    mass_max = float(mass_data.max())  # #[MAXMIN]: Find maximum value
-
     selected_mass_range = st.sidebar.slider(
         "Filter by Mass (g)",
         min_value=mass_min,
@@ -317,37 +360,19 @@ def main():
     st.sidebar.caption(f"Aggregated from {total_raw_classes} raw classifications.")
 
     st.sidebar.markdown("**First 5 Mappings:**")
-    count = 0
-    # [ITERLOOP] and [DICTMETHOD2]: Items
-    for raw_class, major_type in meteorite_class.items():
-        if count < 5:
-            st.sidebar.text(f"{major_type}: [{raw_class}]")
-            count += 1
-        else:
-            break
-
-    # Apply filters
-    filtered_data = meteorite_data.copy()
-
-    #[FILTER1]
-    if selected_types:
-        filtered_data = filtered_data[filtered_data["Type"].isin(selected_types)]
+    # [ITERLOOP] and [DICTMETHOD2]: Items (islice stops after the first 5)
+    for raw_class, major_type in islice(meteorite_class.items(), 5):
+        st.sidebar.text(f"{major_type}: [{raw_class}]")
 
-    #[FILTER2]: Mass
-    filtered_data = filtered_data[
-        (filtered_data['Mass (g)'] >= selected_mass_range[0]) &
-        (filtered_data['Mass (g)'] <= selected_mass_range[1])
-        ]
+    # Apply filters (cached, so changing only a chart color reuses the last result)
+    filtered_data = apply_filters(meteorite_data, FILENAME, tuple(selected_types), selected_mass_range,
+                                  selected_year_range)
 
-    #[FILTER2]: Year
-    filtered_data = filtered_data.dropna(subset=['Year'])
-    filtered_data = filtered_data[
-        (filtered_data['Year'] >= selected_year_range[0]) &
-        (filtered_data['Year'] <= selected_year_range[1])
-        ]
-
-    # Cleaning data for display
-    filtered_data['Year'] = filtered_data['Year'].astype(int)
+    # Counts for Charts 1 and 2: reuse the cached whole-dataset counts unless the mass filter narrows the data
+    if selected_mass_range == (mass_min, mass_max):
+        landing_counts = filter_counts(_all_landing_counts(meteorite_data, FILENAME), selected_types, selected_year_range)
+    else:
+        landing_counts = count_landings(filtered_data)
 
     # Calculate filtered data count
     filtered_records = get_df_count(filtered_data)  #[FUNCCALL2]
@@ -368,14 +393,14 @@ def main():
     if not filtered_data.empty:
 
         # [CHART1]: Landings Over Time (Line Chart)
-        chart_landings_over_time(filtered_data, chart1_color)
+        chart_landings_over_time(landing_counts, chart1_color)
         st.markdown("---")
 
         col1, col2 = st.columns(2)
 
         # [CHART2]: Classification Distribution(Bar chart)
         with col1:
-            chart_type_distribution(filtered_data, chart2_color)
+            chart_type_distribution(landing_counts, chart2_color)
 
         # Top 10 Masses (Bar chart)
         with col2: